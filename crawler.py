@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 from typing import NamedTuple
@@ -19,9 +20,9 @@ logger = logging.getLogger(__name__)
 
 class CardCrawlConfig(NamedTuple):
     """Steam集换卡爬取配置：明确存储核心参数，避免混乱"""
-    breakpoint_env_var: str  # 断点页码的环境变量名（用于续爬）
+    breakpoint_env_var: str  # 断点页码的键名（状态文件与环境变量共用，用于续爬）
     steam_query: str         # Steam市场的集换卡专属查询参数
-    output_json: str         # 爬取结果的输出JSON文件名
+    output_json: str         # 爬取结果的输出文件名（JSON Lines，每行一条）
 
 
 def get_card_crawl_config() -> CardCrawlConfig:
@@ -36,7 +37,7 @@ def get_card_crawl_config() -> CardCrawlConfig:
             "category_753_cardborder[]=tag_cardborder_1"   # 闪亮集换卡
         ),
         # 输出文件：单独存储集换卡数据，避免与其他类型混淆
-        output_json="steam_trading_cards.json"
+        output_json="steam_trading_cards.jsonl"
     )
 
 
@@ -44,28 +45,35 @@ def crawl_steam_trading_cards(config: CardCrawlConfig) -> None:
     """核心功能：执行Steam集换卡爬取任务"""
     logger.info(f"开始爬取Steam集换卡，结果将保存至 {config.output_json}")
 
-    # 读取断点页码：首次爬取默认从第0页开始，续爬从上次中断页码继续
-    last_crawled_page = int(os.getenv(config.breakpoint_env_var, "0"))
-
     try:
         # 初始化集换卡爬虫：参数从环境变量读取，灵活配置
         crawler = SteamItemCrawler(
             steam_api_key=os.getenv("STEAM_API_KEY", ""),  # APIKey可选，空值不影响基础爬取
             batch_size=int(os.getenv("CARD_BATCH_SIZE", "50")),  # 每次爬取50条（默认值可调整）
-            env_file=".env"  # 用于更新断点页码的环境文件路径
+            state_file="crawler_state.json"  # 断点页码单独保存在状态文件中，定期原子写入
+        )
+
+        # 读取断点页码（最后完成的页）：优先使用状态文件，首次爬取回退到.env中的值（默认-1，即从第0页开始）
+        last_crawled_page = crawler.load_checkpoint(
+            config.breakpoint_env_var, int(os.getenv(config.breakpoint_env_var, "-1"))
         )
 
-        # 执行爬取：传递所有必要配置，触发数据采集+续爬+保存
-        crawler.enrich_data(
+        # 执行爬取：传递所有必要配置，触发数据采集+续爬+保存（异步并发抓取各页）
+        asyncio.run(crawler.enrich_data(
             query_item=config.steam_query,
             last_processed_page=last_crawled_page,
             control_env_variable_processed_page=config.breakpoint_env_var,
-            item_type="trading_card",  # 明确标注物品类型为“集换卡”
-            output_file=config.output_json
-        )
+            type="trading_card",  # 明确标注物品类型为“集换卡”
+            subtype="steam_trading_card",
+            file_path=config.output_json
+        ))
 
         logger.info(f"Steam集换卡爬取任务完成！数据已保存到 {config.output_json}")
 
+        # 可选：将逐行追加的结果合并为一个JSON数组文件
+        if os.getenv("EXPORT_JSON", "0") == "1":
+            crawler.consolidate_to_json(config.output_json)
+
     # 捕获爬取中可能出现的异常（如网络错误、Steam接口异常），避免程序崩溃
     except Exception as e:
         logger.error(f"爬取Steam集换卡时出错：{str(e)}", exc_info=True)
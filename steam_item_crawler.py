@@ -1,131 +1,441 @@
+import asyncio
 import datetime
 import dotenv
-import json
+import email.utils
+import functools
+import httpx
+import ijson
 import logging
 import math
+import orjson
 import random
 import os
-import requests
-from urllib.parse import quote
-from timer import Timer
+import signal
+from aiolimiter import AsyncLimiter
+from typing import NamedTuple
+from urllib.parse import parse_qsl, quote
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# 市场搜索接口的默认参数，查询字符串中的同名参数会覆盖这些值
+DEFAULT_SEARCH_PARAMS = {
+    'query': '',
+    'search_descriptions': 0,
+    'sort_column': 'price',
+    'sort_dir': 'asc',
+    'appid': 753,
+    'currency': 1,
+    'norender': 1
+}
+
+# 默认请求头：请求压缩传输，JSON响应体积可缩小数倍（br需安装brotli）
+DEFAULT_HEADERS = {
+    'Accept-Encoding': 'gzip, deflate, br',
+    'User-Agent': 'SteamCardCrawler/1.0'
+}
+
+# 遇到这些状态码时按指数退避重试（限流/服务端临时故障）
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+# 限流状态码：优先按响应头Retry-After等待
+RATE_LIMIT_STATUS_CODES = frozenset({429, 503})
+
+
+class Card(NamedTuple):
+    """单张集换卡的爬取结果：比逐条构造dict更省内存"""
+    item_market_url: str  # 市场链接（同时作为去重键）
+    name: str
+    type: str
+    subtype: str
+    game_name: str
+    game_type: str
+    fetch_time: str
+
+
+@functools.lru_cache(maxsize=4096)
+def encode_hash_name(market_hash_name):
+    """对市场哈希名做URL编码（带缓存，不同页面中重复的哈希名只编码一次）"""
+    return quote(market_hash_name, safe='')
+
+
+def encode_jsonl(cards):
+    """把一批Card编码为JSON Lines字节串"""
+    return b"".join(orjson.dumps(card._asdict()) + b"\n" for card in cards)
+
+
+def parse_retry_after(value):
+    """解析Retry-After响应头（秒数或HTTP日期），返回需要等待的秒数，无法解析时返回None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
 class SteamItemCrawler:
-    def __init__(self, steam_api_key, batch_size, env_file_name):
+    def __init__(self, steam_api_key, batch_size, state_file="crawler_state.json"):
         self.steam_api_key = steam_api_key
         self.batch_size = batch_size
-        self.env_file_name = env_file_name
+        # 断点页码单独存放在状态文件中，.env只保留配置
+        self.state_file = state_file
+        self.checkpoint_every = 5
         self.base_url = "https://steamcommunity.com/market/search/render/"
         self.market_base_url = "https://steamcommunity.com/market/listings/"
+        self.listing_url_prefix = self.market_base_url + "753/"
+        self.concurrency = 8
+        self.max_retries = 5
+        self.backoff_factor = 2
+        # 令牌桶限速：每60秒最多3次请求，并发抓取也不会超出Steam的频率限制
+        self._limiter = AsyncLimiter(max_rate=3, time_period=60)
+        self.client = None
+        self._output = None
+        self._seen_urls: set[str] = set()
+        self._done_pages = set()
+        self._checkpoint_page = -1
+        self._pages_since_checkpoint = 0
+        self._stop = False
+        self._stop_event = None
+        self._loop = None
+
+    def _request_stop(self, signum, frame):
+        if self._stop:
+            # 再次按下Ctrl+C时立即中断
+            signal.default_int_handler(signum, frame)
+        self._stop = True
+        # 信号处理函数不在事件循环内执行，需交给循环去唤醒正在等待的请求
+        self._loop.call_soon_threadsafe(self._stop_event.set)
+        logging.info("收到中断信号，放弃未完成的请求并保存断点后退出（再次按Ctrl+C强制退出）")
 
-    def make_steam_request(self, query, max_results):
-        params = {
-            'query': '',
-            'start': 0,
-            'count': max_results,
-            'search_descriptions': 0,
-            'sort_column': 'price',
-            'sort_dir': 'asc',
-            'appid': 753,
-            'currency': 1,
-            'norender': 1
-        }
-        query_parts = query.lstrip('?').split('&')
-        for part in query_parts:
-            if '=' in part:
-                key, value = part.split('=', 1)
-                if key == 'category_753_item_class%5B%5D':
-                    params['category_753_item_class[]'] = value
-                elif key == 'category_753_cardborder%5B%5D':
-                    params['category_753_cardborder[]'] = value
-                elif key == 'start':
-                    params['start'] = int(value)
-        
+    async def _until_stopped(self, aw):
+        """等待aw完成并返回对应的task；若先收到中断信号则取消aw并返回None"""
+        task = asyncio.ensure_future(aw)
+        stop_waiter = asyncio.ensure_future(self._stop_event.wait())
         try:
-            response = requests.get(self.base_url, params=params, timeout=15)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            logging.error(f"请求Steam API失败：{str(e)}")
-            return None
+            await asyncio.wait((task, stop_waiter), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stop_waiter.cancel()
+            if not task.done():
+                task.cancel()
+        return task if task.done() and not task.cancelled() else None
 
-    def enrich_item_list(self, query_item, last_processed_page, control_env_variable_processed_page, type, subtype, file_path):
-        total_data = self.make_steam_request(query_item, max_results=1)
-        if not total_data or 'total_count' not in total_data:
+    def build_base_params(self, query):
+        """只解析一次查询字符串，得到除分页参数外的固定请求参数"""
+        params = dict(DEFAULT_SEARCH_PARAMS)
+        filters = []
+        for key, value in parse_qsl(query.lstrip('?'), keep_blank_values=True):
+            if key in ('start', 'count'):
+                continue
+            if key in params:
+                params[key] = value
+            else:
+                # 同名筛选条件（如多个cardborder[]）全部保留
+                filters.append((key, value))
+        return httpx.QueryParams(list(params.items()) + filters)
+
+    async def make_steam_request(self, base_params, start, max_results):
+        params = base_params.merge({'start': start, 'count': max_results})
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                # 排队等待限速、请求本身都可被中断信号打断，该页留待下次续爬
+                if await self._until_stopped(self._limiter.acquire()) is None:
+                    return None
+                fetch = await self._until_stopped(self.client.get(self.base_url, params=params))
+                if fetch is None:
+                    return None
+                response = fetch.result()
+                if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                    error = f"HTTP {response.status_code}"
+                    if response.status_code in RATE_LIMIT_STATUS_CODES:
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                else:
+                    response.raise_for_status()
+                    # 直接解析原始字节，跳过文本解码
+                    return orjson.loads(response.content)
+            except httpx.HTTPStatusError as e:
+                logging.error(f"请求Steam API失败：{str(e)}")
+                return None
+            except httpx.RequestError as e:
+                # 含网络错误、响应解压失败（DecodingError）和重定向过多等
+                error = str(e) or type(e).__name__
+                if attempt == self.max_retries:
+                    logging.error(f"请求Steam API失败：{error}")
+                    return None
+            except ValueError as e:
+                logging.error(f"解析Steam API响应失败：{str(e)}")
+                return None
+            # 仅在重试时加入随机抖动，避免多个请求同时重试
+            delay = self.backoff_factor * 2 ** attempt + random.random()
+            if retry_after is not None:
+                # 服务端明确要求的等待时间优先，不短于退避时间
+                delay = max(delay, retry_after)
+            logging.warning(f"请求Steam API失败：{error}，{delay:.1f}秒后第{attempt + 1}次重试")
+            if await self._until_stopped(asyncio.sleep(delay)) is None:
+                return None
+
+    async def enrich_item_list(self, query_item, last_processed_page, control_env_variable_processed_page, type, subtype, file_path):
+        # HTTP/2在同一个TLS连接上复用并发请求，所有页面共用一个客户端
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        self.open_output(file_path)
+        self._done_pages.clear()
+        self._checkpoint_page = last_processed_page
+        self._pages_since_checkpoint = 0
+        self._stop = False
+        self._stop_event = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        previous_handler = signal.signal(signal.SIGINT, self._request_stop)
+        try:
+            async with httpx.AsyncClient(http2=True, limits=limits, timeout=30.0,
+                                         headers=DEFAULT_HEADERS, follow_redirects=True) as client:
+                self.client = client
+                await self._crawl_pages(query_item, last_processed_page, control_env_variable_processed_page, type, subtype, file_path)
+        finally:
+            # 无论正常结束、出错还是被中断，都落盘最新断点
+            signal.signal(signal.SIGINT, previous_handler)
+            self.client = None
+            self.close_output()
+            self.save_checkpoint(control_env_variable_processed_page)
+
+    async def _crawl_pages(self, query_item, last_processed_page, control_env_variable_processed_page, type, subtype, file_path):
+        # 直接请求续爬的第一页，顺带从响应中读取total_count，省去单独的探测请求
+        page_to_process = last_processed_page + 1
+        first_start = page_to_process * self.batch_size
+        base_params = self.build_base_params(query_item)
+        first_data = await self.make_steam_request(base_params, first_start, max_results=self.batch_size)
+        if self._stop:
+            return
+        if not first_data or 'total_count' not in first_data:
             logging.error("获取总物品数失败，退出爬取")
             return
-        total_items = total_data['total_count']
+        total_items = first_data['total_count']
         total_pages = math.ceil(total_items / self.batch_size)
         logging.info(f"=== 开始爬取：共{total_items}个物品，分{total_pages}页 ===")
-        
-        page_to_process = last_processed_page + 1
-        for i in range(page_to_process * self.batch_size, total_items + self.batch_size, self.batch_size):
+
+        pages = range(page_to_process, total_pages)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def worker(current_page, batch_start, page_data=None):
+            async with semaphore:
+                # 收到中断信号后不再开始新的页面
+                if self._stop:
+                    return
+                await self.crawl_page(base_params, current_page, batch_start, total_items, total_pages,
+                                      control_env_variable_processed_page, type, subtype, file_path, page_data)
+
+        try:
+            await asyncio.gather(*(worker(page, page * self.batch_size, first_data if page == page_to_process else None)
+                                   for page in pages))
+        except asyncio.CancelledError:
+            logging.info("程序被用户中断，保存当前数据后退出")
+            raise
+        if self._stop:
+            logging.info(f"=== 爬取已中断，下次将从第{self._checkpoint_page + 1}页继续 ===")
+        else:
+            logging.info(f"=== 全部爬取完成，数据保存在{file_path} ===")
+
+    async def crawl_page(self, base_params, current_page, batch_start, total_items, total_pages, control_env_variable_processed_page, type, subtype, file_path, page_data=None):
+        batch_end = min(batch_start + self.batch_size, total_items)
+        logging.info(f"正在爬取第{current_page}/{total_pages}页：物品{batch_start}-{batch_end}")
+
+        if page_data is None:
+            page_data = await self.make_steam_request(base_params, batch_start, max_results=self.batch_size)
+        if page_data is None and self._stop:
+            # 因中断而放弃的页面无需报错，断点不越过该页
+            return
+        if not page_data or 'results' not in page_data:
+            logging.error(f"爬取第{current_page}页失败，跳过该页")
+            return
+        result_list = page_data['results']
+        if not result_list:
+            # 调度的页面都在total_pages以内，不应为空；限流时Steam可能返回200但结果为空，按失败处理，断点不越过该页
+            logging.error(f"第{current_page}页返回空结果，跳过该页")
+            return
+
+        # 续爬时先只生成链接：整页都已保存过就直接跳过，不再构造数据
+        item_market_urls = [self.item_market_url(item) for item in result_list]
+        if all(url in self._seen_urls for url in item_market_urls):
+            logging.info(f"第{current_page}页已全部保存过，跳过")
+            self.mark_page_done(current_page, control_env_variable_processed_page)
+            return
+
+        # 同一批物品共用一个抓取时间，不必逐条取系统时间
+        fetch_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        current_page_items = []
+        for item, item_market_url in zip(result_list, item_market_urls):
+            # 个别物品缺少asset_description时使用默认值，避免KeyError导致整页丢失
+            asset = item.get('asset_description') or {}
+            current_page_items.append(Card(
+                item_market_url=item_market_url,
+                name=item.get('name', '未知名称'),
+                type=type,
+                subtype=subtype,
+                game_name=asset.get('game', '未知游戏'),
+                game_type=asset.get('type', '未知类型'),
+                fetch_time=fetch_time
+            ))
+
+        self.save_to_json(current_page_items, file_path)
+        self.mark_page_done(current_page, control_env_variable_processed_page)
+
+    def item_market_url(self, item):
+        # 提取Steam官方生成的“市场哈希名”（含游戏ID和物品名）
+        market_hash_name = item.get('hash_name', '')
+        if not market_hash_name:
+            market_hash_name = item.get('name', '').replace(' ', '_')  # 兜底：用物品名生成
+
+        # 拼接GitHub示例格式的链接：/753/市场哈希名
+        return ''.join((self.listing_url_prefix, encode_hash_name(market_hash_name)))
+
+    async def enrich_data(self, query_item, last_processed_page, control_env_variable_processed_page, type, subtype, file_path="steam_all_games_trading_cards.jsonl"):
+        await self.enrich_item_list(query_item, last_processed_page, control_env_variable_processed_page, type, subtype, file_path)
+
+    def load_checkpoint(self, key, default=-1):
+        # 断点记录的是最后完成的页码，-1表示尚未完成任何页面
+        if not os.path.exists(self.state_file):
+            return default
+        try:
+            with open(self.state_file, 'rb') as f:
+                return int(orjson.loads(f.read()).get(key, default))
+        except (orjson.JSONDecodeError, ValueError, AttributeError):
+            logging.warning(f"{self.state_file}格式错误，从第{default + 1}页开始")
+            return default
+
+    def mark_page_done(self, page, key):
+        # 并发时页面完成顺序不固定，断点只推进到连续完成的最后一页
+        self._done_pages.add(page)
+        while self._checkpoint_page + 1 in self._done_pages:
+            self._checkpoint_page += 1
+            self._done_pages.discard(self._checkpoint_page)
+        self._pages_since_checkpoint += 1
+        if self._pages_since_checkpoint >= self.checkpoint_every:
+            self.save_checkpoint(key)
+
+    def save_checkpoint(self, key):
+        # 先把已缓冲的结果写入磁盘，保证断点不会超前于实际保存的数据
+        if self._output is not None:
+            self._output.flush()
+        state = {}
+        if os.path.exists(self.state_file):
             try:
-                Timer.pause(random.uniform(10, 30))
-            except KeyboardInterrupt:
-                logging.info("程序被用户中断，保存当前数据后退出")
-                self.save_to_json([], file_path)
-                return
-                
-            current_page = math.ceil(i / self.batch_size)
-            dotenv.set_key(self.env_file_name, control_env_variable_processed_page, str(current_page))
-            
-            batch_start = i
-            batch_end = min(i + self.batch_size, total_items)
-            logging.info(f"正在爬取第{current_page}/{total_pages}页：物品{batch_start}-{batch_end}")
-            
-            page_query = f"{query_item}&start={batch_start}"
-            page_data = self.make_steam_request(page_query, max_results=self.batch_size)
-            if not page_data or 'results' not in page_data:
-                logging.error(f"爬取第{current_page}页失败，跳过该页")
-                continue
-            result_list = page_data['results']
-            
-            current_page_items = []
-            for item in result_list:
-                # 提取Steam官方生成的“市场哈希名”（含游戏ID和物品名，已正确编码）
-                market_hash_name = item.get('hash_name', '')
-                if not market_hash_name:
-                    market_hash_name = item.get('name', '').replace(' ', '_')  # 兜底：用物品名生成
-                
-                # 拼接GitHub示例格式的链接：/753/市场哈希名
-                item_market_url = f"{self.market_base_url}753/{quote(market_hash_name)}"
-                
-                current_page_items.append({
-                    'item_market_url': item_market_url,
-                    'name': item.get('name', '未知名称'),
-                    'type': type,
-                    'subtype': subtype,
-                    'game_name': item['asset_description'].get('game', '未知游戏'),
-                    'game_type': item['asset_description'].get('type', '未知类型'),
-                    'fetch_time': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                })
-            
-            self.save_to_json(current_page_items, file_path)
-        logging.info(f"=== 全部爬取完成，数据保存在{file_path} ===")
-
-    def enrich_data(self, query_item, last_processed_page, control_env_variable_processed_page, type, subtype):
-        self.enrich_item_list(query_item, last_processed_page, control_env_variable_processed_page, type, subtype, "steam_all_games_trading_cards.json")
+                with open(self.state_file, 'rb') as f:
+                    state = orjson.loads(f.read())
+            except orjson.JSONDecodeError:
+                pass
+        state[key] = self._checkpoint_page
+        # 先写临时文件再原子替换，中途中断也不会留下半个文件
+        tmp_path = self.state_file + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps(state))
+        os.replace(tmp_path, self.state_file)
+        self._pages_since_checkpoint = 0
+        logging.info(f"断点已保存：第{self._checkpoint_page}页")
 
-    def save_to_json(self, data, file_path):
-        existing_data = []
+    def open_output(self, file_path):
+        # 首次使用.jsonl时，先把旧版JSON数组中的数据迁移过来
+        legacy_path = os.path.splitext(file_path)[0] + '.json'
+        if not os.path.exists(file_path) and os.path.exists(legacy_path):
+            self._migrate_legacy_json(legacy_path, file_path)
+
+        # 启动时逐行读取一次历史数据，只保留链接用于去重
+        self._seen_urls.clear()
         if os.path.exists(file_path):
+            self._truncate_partial_line(file_path)
+            with open(file_path, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        self._seen_urls.add(orjson.loads(line)['item_market_url'])
+                    except (orjson.JSONDecodeError, KeyError):
+                        logging.warning(f"{file_path}中存在格式错误的行，已忽略")
+            logging.info(f"已读取{file_path}中{len(self._seen_urls)}条历史数据")
+        self._output = open(file_path, 'ab', buffering=1 << 16)
+
+    def _truncate_partial_line(self, file_path):
+        # 上次异常退出（如kill -9、断电）可能留下写了一半的最后一行，截回到最后一个换行符，
+        # 否则新追加的第一条数据会接在残行后面一起损坏
+        with open(file_path, 'rb+') as f:
+            end = f.seek(0, os.SEEK_END)
+            if end == 0:
+                return
+            f.seek(end - 1)
+            if f.read(1) == b"\n":
+                return
+            pos = end
+            while pos > 0:
+                step = min(1 << 16, pos)
+                pos -= step
+                f.seek(pos)
+                newline = f.read(step).rfind(b"\n")
+                if newline != -1:
+                    pos += newline + 1
+                    break
+            f.truncate(pos)
+        logging.warning(f"{file_path}末尾存在不完整的行，已截断{end - pos}字节")
+
+    def _migrate_legacy_json(self, json_path, file_path):
+        # 用ijson流式解析旧版JSON数组并逐条写入.jsonl，不把整个数组读入内存
+        count = 0
+        tmp_path = file_path + '.tmp'
+        with open(json_path, 'rb') as src, open(tmp_path, 'wb') as dst:
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    existing_data = json.load(f)
-                logging.info(f"已读取{file_path}中{len(existing_data)}条历史数据")
-            except json.JSONDecodeError:
-                logging.warning(f"{file_path}格式错误，将覆盖写入")
-        
-        combined_data = existing_data + [item for item in data if item not in existing_data]
+                for item in ijson.items(src, 'item', use_float=True):
+                    if isinstance(item, dict) and item.get('item_market_url'):
+                        dst.write(orjson.dumps(item) + b"\n")
+                        count += 1
+            except ijson.JSONError:
+                logging.warning(f"{json_path}格式错误，仅迁移前{count}条数据")
+        os.replace(tmp_path, file_path)
+        # 旧文件改名保留，避免之后合并导出的同名.json覆盖它
+        backup_path = os.path.splitext(json_path)[0] + '.legacy.json'
+        os.replace(json_path, backup_path)
+        logging.info(f"已将{json_path}中{count}条历史数据迁移到{file_path}，原文件另存为{backup_path}")
+
+    def close_output(self):
+        if self._output is not None:
+            self._output.close()
+            self._output = None
+
+    def save_to_json(self, data, file_path):
+        # 按链接哈希去重，耗时只与本批数量有关（同批重复项也只保留一条）
+        new_items = list({card.item_market_url: card for card in data
+                          if card.item_market_url not in self._seen_urls}.values())
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(combined_data, f, ensure_ascii=False, indent=2)
-            new_count = len(data) if data else 0
-            logging.info(f"✅ 数据已保存：新增{new_count}条，总计{len(combined_data)}条\n")
+            self._output.write(encode_jsonl(new_items))
         except Exception as e:
+            # 写入失败时不记录链接并向上抛出，该页不会被标记完成，下次续爬重新抓取
             logging.error(f"保存JSON失败：{e}")
+            raise
+        self._seen_urls.update(card.item_market_url for card in new_items)
+        logging.info(f"✅ 数据已保存：新增{len(new_items)}条，总计{len(self._seen_urls)}条\n")
+
+    def consolidate_to_json(self, file_path, json_path=None):
+        """将JSON Lines结果合并为一个JSON数组文件（可选的收尾步骤）"""
+        json_path = json_path or os.path.splitext(file_path)[0] + '.json'
+        # 逐条读取、逐条写出，内存中只保留当前一条数据
+        count = 0
+        tmp_path = json_path + '.tmp'
+        with open(file_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            dst.write(b"[")
+            for line in src:
+                if not line.strip():
+                    continue
+                item = orjson.dumps(orjson.loads(line), option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+                dst.write(b",\n  " if count else b"\n  ")
+                dst.write(item.replace(b"\n", b"\n  "))
+                count += 1
+            dst.write(b"\n]" if count else b"]")
+        os.replace(tmp_path, json_path)
+        logging.info(f"已将{count}条数据合并保存到{json_path}")
+        return json_path
 
 if __name__ == "__main__":
     dotenv.load_dotenv()
@@ -135,13 +445,14 @@ if __name__ == "__main__":
     
     QUERY_ITEM = "?category_753_item_class[]=tag_item_class_2&category_753_cardborder[]=tag_cardborder_0&category_753_cardborder[]=tag_cardborder_1&category_753_type%5B%5D=tag_type_0"
     BATCH_SIZE = 50
-    ENV_FILE = ".env"
-    LAST_PROCESSED_PAGE = int(os.getenv("ALL_GAMES_CARD_PAGE", 0))
     CONTROL_VAR = "ALL_GAMES_CARD_PAGE"
     ITEM_TYPE = "trading_card"
     ITEM_SUBTYPE = "steam_all_games"
     
-    crawler = SteamItemCrawler(steam_api_key, BATCH_SIZE, ENV_FILE)
+    crawler = SteamItemCrawler(steam_api_key, BATCH_SIZE)
+    LAST_PROCESSED_PAGE = crawler.load_checkpoint(CONTROL_VAR, int(os.getenv(CONTROL_VAR, -1)))
     logging.info("=== Steam全游戏集换卡爬虫启动（生成GitHub格式链接）===\n")
-    crawler.enrich_data(QUERY_ITEM, LAST_PROCESSED_PAGE, CONTROL_VAR, ITEM_TYPE, ITEM_SUBTYPE)
+    asyncio.run(crawler.enrich_data(QUERY_ITEM, LAST_PROCESSED_PAGE, CONTROL_VAR, ITEM_TYPE, ITEM_SUBTYPE))
+    if os.getenv("EXPORT_JSON", "0") == "1":
+        crawler.consolidate_to_json("steam_all_games_trading_cards.jsonl")
     logging.info("=== 爬虫运行结束 ===")